@@ -7,54 +7,147 @@ Outputs to stdout for Templater integration
 
 import os
 import sys
+import heapq
 import subprocess
 import platform
 from pathlib import Path
 from datetime import datetime, timedelta
 import argparse
+import threading
 from urllib.parse import quote
+from operator import itemgetter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from file_census_common import FileInfo, format_file_size, format_date, get_downloads_folder
+
+# The codecs writer installed on Windows below, if any
+UTF8_STDOUT = None
 
 # Configure UTF-8 encoding for Windows
 if os.name == 'nt':  # Windows
     import codecs
-    sys.stdout = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
+    sys.stdout = UTF8_STDOUT = codecs.getwriter('utf-8')(sys.stdout.buffer, 'strict')
     if hasattr(sys.stderr, 'buffer'):
         sys.stderr = codecs.getwriter('utf-8')(sys.stderr.buffer, 'strict')
 
 
-def format_file_size(size_bytes):
-    """Convert bytes to human readable format"""
-    if size_bytes == 0:
-        return "0 B"
+# Number of largest/oldest files listed in the report
+TOP_FILES_COUNT = 15
+
+
+def build_file_info(entry, stat_info):
+    """
+    Build the per-file record from a scandir entry and its stat result
+    Only the fields the report uses are filled in (no extension)
+    """
+    return FileInfo(entry.name, entry.path, stat_info.st_size, stat_info.st_mtime)
+
+
+def new_file_stats(recent_cutoff, folder_index=0):
+    """
+    Create running statistics for a stream of files
+    Only the top 15 largest/oldest files and the recent files are kept
+    folder_index is the position of the top-level subfolder in scan order
+    (0 for the files directly in the scanned folder)
+    """
+    # Entries carry a negated scan-order key, (-folder_index, -file_index), so
+    # ties keep the earliest-scanned files, as the old stable sorts did, and
+    # FileInfo records are never compared
+    return {
+        'file_count': 0,
+        'total_size': 0,
+        'oldest_time': float('inf'),
+        'newest_time': float('-inf'),
+        'largest': [],  # min-heap of (size, -order, file_info)
+        'oldest': [],  # min-heap of (-mtime, -order, file_info), i.e. newest of the oldest on top
+        'recent': [],  # (-order, file_info)
+        'recent_cutoff': recent_cutoff,
+        'folder_index': folder_index
+    }
+
+
+def push_bounded(heap, item):
+    """Push item onto a heap, keeping at most TOP_FILES_COUNT entries"""
+    if len(heap) < TOP_FILES_COUNT:
+        heapq.heappush(heap, item)
+    else:
+        heapq.heappushpop(heap, item)
+
+
+def add_file(stats, file_info):
+    """Fold one file into running statistics"""
+    neg_order = (-stats['folder_index'], -stats['file_count'])
+    stats['file_count'] += 1
+    stats['total_size'] += file_info.size
+    
+    mtime = file_info.mtime
+    if mtime < stats['oldest_time']:
+        stats['oldest_time'] = mtime
+    if mtime > stats['newest_time']:
+        stats['newest_time'] = mtime
     
-    size_names = ["B", "KB", "MB", "GB", "TB"]
-    i = 0
-    while size_bytes >= 1024 and i < len(size_names) - 1:
-        size_bytes /= 1024.0
-        i += 1
+    push_bounded(stats['largest'], (file_info.size, neg_order, file_info))
+    push_bounded(stats['oldest'], (-mtime, neg_order, file_info))
     
-    return f"{size_bytes:.1f} {size_names[i]}"
+    if mtime >= stats['recent_cutoff']:
+        stats['recent'].append((neg_order, file_info))
 
 
-def format_date(timestamp):
-    """Format timestamp for readable display"""
-    return datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M')
+def merge_file_stats(stats, other):
+    """Fold the running statistics of a subfolder into stats"""
+    stats['file_count'] += other['file_count']
+    stats['total_size'] += other['total_size']
+    stats['oldest_time'] = min(stats['oldest_time'], other['oldest_time'])
+    stats['newest_time'] = max(stats['newest_time'], other['newest_time'])
+    
+    for item in other['largest']:
+        push_bounded(stats['largest'], item)
+    for item in other['oldest']:
+        push_bounded(stats['oldest'], item)
+    
+    stats['recent'].extend(other['recent'])
 
 
-def get_downloads_folder():
-    """Get Windows Downloads folder path"""
-    if os.name == 'nt':  # Windows
-        downloads_path = Path.home() / 'Downloads'
-    else:  # Fallback for other systems
-        downloads_path = Path.home() / 'Downloads'
+def walk_subtree(dir_path, recent_cutoff, stop_event, folder_index):
+    """
+    Walk one subfolder tree with os.scandir, depth-first in the same order as rglob
+    Stops early once stop_event is set (e.g. on Ctrl+C)
+    Returns running statistics for the files in it
+    """
+    stats = new_file_stats(recent_cutoff, folder_index)
+    stack = [dir_path]
+    
+    while stack and not stop_event.is_set():
+        subdirs = []
+        try:
+            with os.scandir(stack.pop()) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirs.append(entry.path)
+                        elif entry.is_file():
+                            # Symlinked files count (with their target's size)
+                            stat_info = entry.stat()
+                            add_file(stats, build_file_info(entry, stat_info))
+                    except (OSError, PermissionError):
+                        # Skip files we can't access
+                        continue
+        except (OSError, PermissionError):
+            # Skip folders we can't access
+            continue
+        
+        # Reversed so the first subfolder is popped (walked) next
+        stack.extend(reversed(subdirs))
     
-    return downloads_path
+    return stats
 
 
-def scan_downloads_folder(folder_path):
+def scan_downloads_folder(folder_path, workers=8):
     """
-    Scan Downloads folder recursively and return file information and subfolder data
-    Returns tuple: (files_data, subfolders_data)
+    Scan Downloads folder recursively and return file statistics and subfolder data
+    Each top-level subfolder is walked on its own worker thread, and files are
+    folded into running statistics as they are found rather than kept in a list
+    Returns tuple: (file_stats, subfolders_data)
     """
     folder_path = Path(folder_path)
     
@@ -66,78 +159,90 @@ def scan_downloads_folder(folder_path):
         print(f"Error: Path is not a directory: {folder_path}", file=sys.stderr)
         sys.exit(1)
     
-    files_data = []
+    # Files from last 7 days
+    seven_days_ago = datetime.now().timestamp() - (7 * 24 * 60 * 60)
+    
+    file_stats = new_file_stats(seven_days_ago)
     subfolders_data = []
+    subfolder_entries = []
     
     try:
-        # Scan all files recursively
-        for file_path in folder_path.rglob('*'):
-            if file_path.is_file():
+        # Files directly in the folder are handled inline; subfolders go to the pool
+        with os.scandir(folder_path) as entries:
+            for entry in entries:
                 try:
-                    stat_info = file_path.stat()
-                    
-                    file_info = {
-                        'name': file_path.name,
-                        'size_bytes': stat_info.st_size,
-                        'size_formatted': format_file_size(stat_info.st_size),
-                        'modified_time': stat_info.st_mtime,
-                        'modified_formatted': format_date(stat_info.st_mtime),
-                        'path': str(file_path),
-                        'relative_path': str(file_path.relative_to(folder_path))
-                    }
-                    
-                    files_data.append(file_info)
-                    
+                    # Symlinked folders get a subfolder row, as with Path.is_dir()
+                    if entry.is_dir():
+                        subfolder_entries.append(entry)
+                    elif entry.is_file():
+                        # Symlinked files count (with their target's size)
+                        stat_info = entry.stat()
+                        add_file(file_stats, build_file_info(entry, stat_info))
                 except (OSError, PermissionError):
                     # Skip files we can't access
                     continue
         
         # Analyze subfolders (direct subdirectories only)
-        for subfolder_path in folder_path.iterdir():
-            if subfolder_path.is_dir():
-                try:
-                    # Count files and calculate total size in this subfolder
-                    file_count = 0
-                    total_size = 0
-                    
-                    for file_path in subfolder_path.rglob('*'):
-                        if file_path.is_file():
-                            try:
-                                stat_info = file_path.stat()
-                                file_count += 1
-                                total_size += stat_info.st_size
-                            except (OSError, PermissionError):
-                                continue
-                    
-                    if file_count > 0:  # Only include folders with files
+        stop_event = threading.Event()
+        executor = ThreadPoolExecutor(max_workers=workers)
+        futures = {
+            executor.submit(walk_subtree, entry.path, seven_days_ago, stop_event, index): (index, entry)
+            for index, entry in enumerate(subfolder_entries, 1)
+        }
+        subfolder_rows = []  # (index, subfolder_info), put back in scan order below
+        try:
+            for future in as_completed(futures):
+                index, subfolder_entry = futures[future]
+                subfolder_stats = future.result()
+                
+                # Files behind a symlinked folder count toward its row only,
+                # not the overall totals (rglob never descends into it)
+                if not subfolder_entry.is_symlink():
+                    merge_file_stats(file_stats, subfolder_stats)
+                
+                file_count = subfolder_stats['file_count']
+                total_size = subfolder_stats['total_size']
+                
+                if file_count > 0:  # Only include folders with files
+                    try:
                         # Get folder creation/modification time
-                        folder_stat = subfolder_path.stat()
-                        
-                        subfolder_info = {
-                            'name': subfolder_path.name,
-                            'file_count': file_count,
-                            'total_size': total_size,
-                            'total_size_formatted': format_file_size(total_size),
-                            'created_time': folder_stat.st_ctime,
-                            'created_formatted': format_date(folder_stat.st_ctime),
-                            'path': str(subfolder_path)
-                        }
-                        subfolders_data.append(subfolder_info)
-                        
-                except (OSError, PermissionError):
-                    # Skip folders we can't access
-                    continue
+                        folder_stat = subfolder_entry.stat()
+                    except (OSError, PermissionError):
+                        # Skip folders we can't access
+                        continue
+                    
+                    subfolder_info = {
+                        'name': subfolder_entry.name,
+                        'file_count': file_count,
+                        'total_size': total_size,
+                        'total_size_formatted': format_file_size(total_size),
+                        'created_time': folder_stat.st_ctime,
+                        'created_formatted': format_date(folder_stat.st_ctime),
+                        'path': subfolder_entry.path
+                    }
+                    subfolder_rows.append((index, subfolder_info))
+        except BaseException:
+            # Ctrl+C or an error: stop running walks and drop queued ones
+            # instead of waiting for every subfolder to finish
+            stop_event.set()
+            for future in futures:
+                future.cancel()
+            executor.shutdown(wait=False)
+            raise
+        executor.shutdown()
+        
+        subfolders_data = [subfolder_info for _, subfolder_info in sorted(subfolder_rows, key=itemgetter(0))]
                     
     except PermissionError:
         print(f"Error: Permission denied accessing folder: {folder_path}", file=sys.stderr)
         sys.exit(1)
     
-    return files_data, subfolders_data
+    return file_stats, subfolders_data
 
 
-def analyze_files(files_data, subfolders_data):
-    """Analyze file data and return various statistics"""
-    if not files_data:
+def analyze_files(file_stats, subfolders_data):
+    """Turn running file statistics into the report values"""
+    if not file_stats['file_count']:
         return {
             'total_files': 0,
             'total_size': 0,
@@ -151,24 +256,19 @@ def analyze_files(files_data, subfolders_data):
         }
     
     # Basic stats
-    total_files = len(files_data)
-    total_size = sum(f['size_bytes'] for f in files_data)
+    total_files = file_stats['file_count']
+    total_size = file_stats['total_size']
     average_size = total_size / total_files if total_files > 0 else 0
     
-    # Date range
-    oldest_date = min(f['modified_time'] for f in files_data)
-    newest_date = max(f['modified_time'] for f in files_data)
-    
     # Top 15 largest files
-    largest_files = sorted(files_data, key=lambda x: x['size_bytes'], reverse=True)[:15]
+    largest_files = [file_info for _, _, file_info in sorted(file_stats['largest'], reverse=True)]
     
     # Files from last 7 days
-    seven_days_ago = datetime.now().timestamp() - (7 * 24 * 60 * 60)
-    recent_files = [f for f in files_data if f['modified_time'] >= seven_days_ago]
-    recent_files.sort(key=lambda x: x['modified_time'], reverse=True)
+    recent = sorted(file_stats['recent'], key=lambda x: (x[1].mtime, x[0]), reverse=True)
+    recent_files = [file_info for _, file_info in recent]
     
     # 15 oldest files
-    oldest_files = sorted(files_data, key=lambda x: x['modified_time'])[:15]
+    oldest_files = [file_info for _, _, file_info in sorted(file_stats['oldest'], reverse=True)]
     
     # Sort subfolders by size (largest first)
     sorted_subfolders = sorted(subfolders_data, key=lambda x: x['total_size'], reverse=True)
@@ -179,8 +279,8 @@ def analyze_files(files_data, subfolders_data):
         'total_size_formatted': format_file_size(total_size),
         'average_size': average_size,
         'average_size_formatted': format_file_size(average_size),
-        'oldest_date': format_date(oldest_date),
-        'newest_date': format_date(newest_date),
+        'oldest_date': format_date(file_stats['oldest_time']),
+        'newest_date': format_date(file_stats['newest_time']),
         'largest_files': largest_files,
         'recent_files': recent_files,
         'oldest_files': oldest_files,
@@ -188,6 +288,25 @@ def analyze_files(files_data, subfolders_data):
     }
 
 
+def write_stdout(text):
+    """
+    Write text to stdout as UTF-8 bytes in a single call
+    Looks up sys.stdout at call time so callers can redirect it
+    """
+    if UTF8_STDOUT is not None and sys.stdout is UTF8_STDOUT:
+        # Skip our own codecs writer and write to the stream it wraps
+        stdout_buffer = UTF8_STDOUT.stream
+    else:
+        stdout_buffer = getattr(sys.stdout, 'buffer', None)
+    
+    if stdout_buffer is not None:
+        sys.stdout.flush()
+        stdout_buffer.write(text.encode('utf-8'))
+        stdout_buffer.flush()
+    else:
+        sys.stdout.write(text)
+
+
 def truncate_filename(filename, max_length=40):
     """Truncate filename if too long, preserving extension"""
     if len(filename) <= max_length:
@@ -207,107 +326,123 @@ def truncate_filename(filename, max_length=40):
 
 def generate_markdown_report(analysis):
     """Generate markdown report for Obsidian"""
+    parts = []
     
-    print("# Downloads Weekly Review")
-    print()
+    parts.append("# Downloads Weekly Review")
+    parts.append("")
     
     # Summary Section
-    print("## Summary")
-    print()
-    print(f"- **Total files:** {analysis['total_files']:,}")
-    print(f"- **Date range:** {analysis['oldest_date']} to {analysis['newest_date']}")
-    print(f"- **Total size:** {analysis['total_size_formatted']}")
-    print(f"- **Average file size:** {analysis['average_size_formatted']}")
-    print()
+    parts.append("## Summary")
+    parts.append("")
+    parts.append(f"- **Total files:** {analysis['total_files']:,}")
+    parts.append(f"- **Date range:** {analysis['oldest_date']} to {analysis['newest_date']}")
+    parts.append(f"- **Total size:** {analysis['total_size_formatted']}")
+    parts.append(f"- **Average file size:** {analysis['average_size_formatted']}")
+    parts.append("")
     
     # Action button to open Downloads folder
     downloads_path = get_downloads_folder()
-    print(f'```button')
-    print(f'name Open Downloads Folder 📁')
-    print(f'type link')
-    print(f'action file:///{downloads_path}')
-    print(f'```')
-    print()
+    parts.append(f'```button')
+    parts.append(f'name Open Downloads Folder 📁')
+    parts.append(f'type link')
+    parts.append(f'action file:///{downloads_path}')
+    parts.append(f'```')
+    parts.append("")
     
     # Top 15 Largest Files
-    print("## 🔥 Top 15 Largest Files")
-    print()
+    parts.append("## 🔥 Top 15 Largest Files")
+    parts.append("")
     if analysis['largest_files']:
-        print("| File | Size | Date | Delete |")
-        print("|------|------|------|--------|")
+        parts.append("| File | Size | Date | Delete |")
+        parts.append("|------|------|------|--------|")
         for file_info in analysis['largest_files']:
             # Truncate and escape pipes in filename for markdown table
-            filename = truncate_filename(file_info['name']).replace('|', '\\|')
+            filename = truncate_filename(file_info.name).replace('|', '\\|')
             # Create URI link for deletion using Shell Commands with custom variable
-            file_path_clean = file_info['path'].replace('\\', '/')
+            file_path_clean = file_info.path.replace('\\', '/')
             # URL encode the file path to handle special characters like brackets
             file_path_encoded = quote(file_path_clean, safe='/:')
             # Use the working shell command ID (19bemkchg3) with _file_path parameter
             delete_link = f"[🗑️](obsidian://shell-commands/?execute=19bemkchg3&_file_path={file_path_encoded})"
-            print(f"| {filename} | {file_info['size_formatted']} | {file_info['modified_formatted']} | {delete_link} |")
+            parts.append(f"| {filename} | {format_file_size(file_info.size)} | {format_date(file_info.mtime)} | {delete_link} |")
     else:
-        print("*No files found*")
-    print()
+        parts.append("*No files found*")
+    parts.append("")
   
    
     # Files from Last Week
-    print("## 📅 Files from Last Week")
-    print()
+    parts.append("## 📅 Files from Last Week")
+    parts.append("")
     if analysis['recent_files']:
-        print(f"*{len(analysis['recent_files'])} files modified in the last 7 days*")
-        print()
-        print("| File | Size | Date | Delete |")
-        print("|------|------|------|--------|")
+        parts.append(f"*{len(analysis['recent_files'])} files modified in the last 7 days*")
+        parts.append("")
+        parts.append("| File | Size | Date | Delete |")
+        parts.append("|------|------|------|--------|")
         for file_info in analysis['recent_files']:
-            filename = truncate_filename(file_info['name']).replace('|', '\\|')
+            filename = truncate_filename(file_info.name).replace('|', '\\|')
             # Create delete link for recent files
-            file_path_clean = file_info['path'].replace('\\', '/')
+            file_path_clean = file_info.path.replace('\\', '/')
             file_path_encoded = quote(file_path_clean, safe='/:')
             delete_link = f"[🗑️](obsidian://shell-commands/?execute=19bemkchg3&_file_path={file_path_encoded})"
-            print(f"| {filename} | {file_info['size_formatted']} | {file_info['modified_formatted']} | {delete_link} |")
+            parts.append(f"| {filename} | {format_file_size(file_info.size)} | {format_date(file_info.mtime)} | {delete_link} |")
     else:
-        print("*No files modified in the last 7 days*")
-    print()
+        parts.append("*No files modified in the last 7 days*")
+    parts.append("")
     
     # 15 Oldest Files
-    print("## 🕰️ 15 Oldest Files")
-    print()
+    parts.append("## 🕰️ 15 Oldest Files")
+    parts.append("")
     if analysis['oldest_files']:
-        print("| File | Size | Date | Delete |")
-        print("|------|------|------|--------|")
+        parts.append("| File | Size | Date | Delete |")
+        parts.append("|------|------|------|--------|")
         for file_info in analysis['oldest_files']:
-            filename = truncate_filename(file_info['name']).replace('|', '\\|')
+            filename = truncate_filename(file_info.name).replace('|', '\\|')
             # Create delete link for oldest files
-            file_path_clean = file_info['path'].replace('\\', '/')
+            file_path_clean = file_info.path.replace('\\', '/')
             file_path_encoded = quote(file_path_clean, safe='/:')
             delete_link = f"[🗑️](obsidian://shell-commands/?execute=19bemkchg3&_file_path={file_path_encoded})"
-            print(f"| {filename} | {file_info['size_formatted']} | {file_info['modified_formatted']} | {delete_link} |")
+            parts.append(f"| {filename} | {format_file_size(file_info.size)} | {format_date(file_info.mtime)} | {delete_link} |")
     else:
-        print("*No files found*")
-    print()
+        parts.append("*No files found*")
+    parts.append("")
     
     # Subfolders
-    print("## 📁 Subfolders")
-    print()
+    parts.append("## 📁 Subfolders")
+    parts.append("")
     if analysis['subfolders']:
-        print("| Folder | Files | Total Size | Created | Delete |")
-        print("|--------|-------|------------|---------|--------|")
+        parts.append("| Folder | Files | Total Size | Created | Delete |")
+        parts.append("|--------|-------|------------|---------|--------|")
         for folder_info in analysis['subfolders']:
             folder_name = folder_info['name'].replace('|', '\\|')
             # Create delete link for subfolders (uses Delete-Folder command)
             folder_path_clean = folder_info['path'].replace('\\', '/')
             folder_path_encoded = quote(folder_path_clean, safe='/:')
             delete_link = f"[🗑️](obsidian://shell-commands/?execute=1m50a7pkiu&_file_path={folder_path_encoded})"
-            print(f"| {folder_name} | {folder_info['file_count']:,} | {folder_info['total_size_formatted']} | {folder_info['created_formatted']} | {delete_link} |")
+            parts.append(f"| {folder_name} | {folder_info['file_count']:,} | {folder_info['total_size_formatted']} | {folder_info['created_formatted']} | {delete_link} |")
     else:
-        print("*No subfolders found*")
-    print()
+        parts.append("*No subfolders found*")
+    parts.append("")
+    
+    write_stdout('\n'.join(parts) + '\n')
+
+
+def positive_int(value):
+    """argparse type for options that must be a whole number of at least 1"""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: '{value}'")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
 
 
 def main():
     parser = argparse.ArgumentParser(description='Generate Downloads weekly review for Obsidian')
     parser.add_argument('--folder', '-f', 
                        help='Downloads folder path (default: Windows Downloads folder)')
+    parser.add_argument('--workers', '-w', type=positive_int, default=8,
+                       help='Number of threads used to scan subfolders (default: 8)')
     
     args = parser.parse_args()
     
@@ -319,10 +454,10 @@ def main():
     
     try:
         # Scan folder
-        files_data, subfolders_data = scan_downloads_folder(downloads_folder)
+        file_stats, subfolders_data = scan_downloads_folder(downloads_folder, args.workers)
         
         # Analyze data
-        analysis = analyze_files(files_data, subfolders_data)
+        analysis = analyze_files(file_stats, subfolders_data)
         
         # Generate markdown report
         generate_markdown_report(analysis)
@@ -10,34 +10,12 @@ from pathlib import Path
 from datetime import datetime
 import argparse
 
-
-def get_downloads_folder():
-    """Get the Downloads folder path for the current user"""
-    if os.name == 'nt':  # Windows
-        downloads_path = Path.home() / 'Downloads'
-    else:  # macOS/Linux
-        downloads_path = Path.home() / 'Downloads'
-    
-    return downloads_path
-
-
-def format_file_size(size_bytes):
-    """Convert bytes to human readable format"""
-    if size_bytes == 0:
-        return "0 B"
-    
-    size_names = ["B", "KB", "MB", "GB", "TB"]
-    i = 0
-    while size_bytes >= 1024 and i < len(size_names) - 1:
-        size_bytes /= 1024.0
-        i += 1
-    
-    return f"{size_bytes:.1f} {size_names[i]}"
+from file_census_common import FileInfo, get_downloads_folder
 
 
 def scan_folder(folder_path, show_progress=True):
     """
-    Efficiently scan folder and yield file information
+    Efficiently scan folder and yield FileInfo records
     """
     folder_path = Path(folder_path)
     
@@ -47,49 +25,50 @@ def scan_folder(folder_path, show_progress=True):
     if not folder_path.is_dir():
         raise NotADirectoryError(f"Path is not a directory: {folder_path}")
     
-    file_count = 0
     processed_count = 0
     
-    # First pass: count total files for progress tracking
-    if show_progress:
-        print("Counting files...", end="", flush=True)
-        try:
-            for _ in folder_path.rglob('*'):
-                if _.is_file():
-                    file_count += 1
-            print(f" Found {file_count} files")
-        except PermissionError:
-            print(" (Unable to count all files due to permissions)")
-            file_count = 0
-    
-    # Second pass: process files
+    # Process files in a single pass (progress shows a running count)
+    stack = [str(folder_path)]
     try:
-        for file_path in folder_path.rglob('*'):
-            if file_path.is_file():
-                try:
-                    stat_info = file_path.stat()
-                    
-                    file_info = {
-                        'filename': file_path.name,
-                        'full_path': str(file_path),
-                        'size_bytes': stat_info.st_size,
-                        'size_formatted': format_file_size(stat_info.st_size),
-                        'modified_date': datetime.fromtimestamp(stat_info.st_mtime).strftime('%Y-%m-%d %H:%M:%S'),
-                        'extension': file_path.suffix.lower()
-                    }
-                    
-                    processed_count += 1
-                    
-                    if show_progress and file_count > 0 and processed_count % 100 == 0:
-                        progress = (processed_count / file_count) * 100
-                        print(f"\rProcessing files... {processed_count}/{file_count} ({progress:.1f}%)", end="", flush=True)
-                    
-                    yield file_info
-                    
-                except (OSError, PermissionError) as e:
-                    if show_progress:
-                        print(f"\nSkipping {file_path}: {e}")
-                    continue
+        while stack:
+            dir_path = stack.pop()
+            try:
+                with os.scandir(dir_path) as entries:
+                    for entry in entries:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                stack.append(entry.path)
+                                continue
+                            if not entry.is_file():
+                                continue
+                            
+                            # Symlinked files count (with their target's size)
+                            stat_info = entry.stat()
+                            
+                            file_info = FileInfo(
+                                entry.name,
+                                entry.path,
+                                stat_info.st_size,
+                                stat_info.st_mtime,
+                                os.path.splitext(entry.name)[1].lower()
+                            )
+                            
+                        except (OSError, PermissionError) as e:
+                            if show_progress:
+                                print(f"\nSkipping {entry.path}: {e}")
+                            continue
+                        
+                        processed_count += 1
+                        
+                        if show_progress and processed_count % 500 == 0:
+                            print(f"\rProcessing... {processed_count} files", end="", flush=True)
+                        
+                        yield file_info
+                        
+            except (OSError, PermissionError) as e:
+                if show_progress:
+                    print(f"\nSkipping {dir_path}: {e}")
+                continue
                     
     except KeyboardInterrupt:
         print(f"\nInterrupted. Processed {processed_count} files.")
@@ -109,16 +88,23 @@ def create_csv_report(folder_path, output_file=None, show_progress=True):
     
     output_path = Path(output_file)
     
-    fieldnames = ['filename', 'full_path', 'size_bytes', 'size_formatted', 'modified_date', 'extension']
+    fieldnames = ['filename', 'full_path', 'size_bytes', 'modified_date', 'extension']
     
     try:
-        with open(output_path, 'w', newline='', encoding='utf-8') as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            writer.writeheader()
+        with open(output_path, 'w', newline='', encoding='utf-8', buffering=1 << 20) as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(fieldnames)
             
             files_written = 0
             for file_info in scan_folder(folder_path, show_progress):
-                writer.writerow(file_info)
+                writer.writerow((
+                    file_info.name,
+                    file_info.path,
+                    file_info.size,
+                    # Same text as strftime('%Y-%m-%d %H:%M:%S'), without the format parsing
+                    datetime.fromtimestamp(file_info.mtime).isoformat(' ', 'seconds'),
+                    file_info.ext
+                ))
                 files_written += 1
             
             if show_progress:
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+File Census Common - Helpers shared by the census, summary and weekly review scripts
+"""
+
+import os
+from pathlib import Path
+from datetime import datetime
+from collections import namedtuple
+
+
+# One scanned file; cheaper to build and hold than a dict per file
+# ext is left as None by callers that never report extensions
+FileInfo = namedtuple('FileInfo', 'name path size mtime ext', defaults=(None,))
+
+
+SIZE_UNITS = ('B', 'KB', 'MB', 'GB', 'TB')
+SIZE_DIVISORS = (1, 1024, 1024 ** 2, 1024 ** 3, 1024 ** 4)
+
+
+def format_file_size(size_bytes):
+    """Convert bytes to human readable format"""
+    if size_bytes == 0:
+        return "0 B"
+    
+    # Each unit is 2**10 larger, so the unit index falls out of the bit length
+    i = min(max(int(size_bytes).bit_length() - 1, 0) // 10, len(SIZE_UNITS) - 1)
+    
+    return f"{size_bytes / SIZE_DIVISORS[i]:.1f} {SIZE_UNITS[i]}"
+
+
+def format_date(timestamp):
+    """Format timestamp for readable display"""
+    return datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M')
+
+
+def get_downloads_folder():
+    """Get the Downloads folder path for the current user"""
+    if os.name == 'nt':  # Windows
+        downloads_path = Path.home() / 'Downloads'
+    else:  # macOS/Linux
+        downloads_path = Path.home() / 'Downloads'
+    
+    return downloads_path
@@ -6,24 +6,13 @@ Summary Report Generator - Create markdown summary from file census data
 import os
 import csv
 import sys
+import heapq
 from pathlib import Path
 from datetime import datetime, timedelta
 from collections import Counter, defaultdict
 import argparse
 
-
-def format_file_size(size_bytes):
-    """Convert bytes to human readable format"""
-    if size_bytes == 0:
-        return "0 B"
-    
-    size_names = ["B", "KB", "MB", "GB", "TB"]
-    i = 0
-    while size_bytes >= 1024 and i < len(size_names) - 1:
-        size_bytes /= 1024.0
-        i += 1
-    
-    return f"{size_bytes:.1f} {size_names[i]}"
+from file_census_common import format_file_size
 
 
 def read_csv_data(csv_file):
@@ -36,8 +25,9 @@ def read_csv_data(csv_file):
             for row in reader:
                 # Convert size to integer
                 row['size_bytes'] = int(row['size_bytes'])
-                # Parse modified date
-                row['modified_datetime'] = datetime.strptime(row['modified_date'], '%Y-%m-%d %H:%M:%S')
+                # Parse modified date ('%Y-%m-%d %H:%M:%S' is ISO format, and
+                # fromisoformat parses it in C without strptime's format handling)
+                row['modified_datetime'] = datetime.fromisoformat(row['modified_date'])
                 files_data.append(row)
     except FileNotFoundError:
         print(f"Error: CSV file not found: {csv_file}")
@@ -56,26 +46,35 @@ def analyze_data(files_data):
     # Total files
     analysis['total_files'] = len(files_data)
     
-    # Total size
-    total_size = sum(file_info['size_bytes'] for file_info in files_data)
-    analysis['total_size'] = total_size
-    analysis['total_size_formatted'] = format_file_size(total_size)
-    
-    # Top 10 largest files
-    largest_files = sorted(files_data, key=lambda x: x['size_bytes'], reverse=True)[:10]
-    analysis['largest_files'] = largest_files
-    
-    # File type breakdown
+    # Total size, file type breakdown and files by year in a single pass
+    total_size = 0
     extension_counts = Counter()
     extension_sizes = defaultdict(int)
+    year_counts = defaultdict(int)
+    year_sizes = defaultdict(int)
     
     for file_info in files_data:
+        size_bytes = file_info['size_bytes']
+        total_size += size_bytes
+        
         ext = file_info['extension'].lower()
         if not ext:
             ext = '(no extension)'
         extension_counts[ext] += 1
-        extension_sizes[ext] += file_info['size_bytes']
+        extension_sizes[ext] += size_bytes
+        
+        year = file_info['modified_datetime'].year
+        year_counts[year] += 1
+        year_sizes[year] += size_bytes
+    
+    analysis['total_size'] = total_size
+    analysis['total_size_formatted'] = format_file_size(total_size)
     
+    # Top 10 largest files
+    largest_files = heapq.nlargest(10, files_data, key=lambda x: x['size_bytes'])
+    analysis['largest_files'] = largest_files
+    
+    # File type breakdown
     analysis['file_types'] = []
     for ext, count in extension_counts.most_common():
         analysis['file_types'].append({
@@ -86,14 +85,6 @@ def analyze_data(files_data):
         })
     
     # Files by year
-    year_counts = defaultdict(int)
-    year_sizes = defaultdict(int)
-    
-    for file_info in files_data:
-        year = file_info['modified_datetime'].year
-        year_counts[year] += 1
-        year_sizes[year] += file_info['size_bytes']
-    
     analysis['files_by_year'] = []
     for year in sorted(year_counts.keys(), reverse=True):
         analysis['files_by_year'].append({
@@ -110,54 +101,69 @@ def generate_markdown_report(analysis, output_file):
     """Generate markdown report"""
     timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
     
-    markdown_content = f"""# File Census Summary Report
-
-Generated on: {timestamp}
-
-## Overview
-
-- **Total Files**: {analysis['total_files']:,}
-- **Total Size**: {analysis['total_size_formatted']} ({analysis['total_size']:,} bytes)
-
-## Top 10 Largest Files
-
-| Rank | Filename | Size | Modified Date |
-|------|----------|------|---------------|
-"""
+    parts = [
+        "# File Census Summary Report",
+        "",
+        f"Generated on: {timestamp}",
+        "",
+        "## Overview",
+        "",
+        f"- **Total Files**: {analysis['total_files']:,}",
+        f"- **Total Size**: {analysis['total_size_formatted']} ({analysis['total_size']:,} bytes)",
+        "",
+        "## Top 10 Largest Files",
+        "",
+        "| Rank | Filename | Size | Modified Date |",
+        "|------|----------|------|---------------|",
+    ]
     
     for i, file_info in enumerate(analysis['largest_files'], 1):
         filename = file_info['filename'].replace('|', '\\|')  # Escape pipes for markdown
-        markdown_content += f"| {i} | `{filename}` | {file_info['size_formatted']} | {file_info['modified_date']} |\n"
+        parts.append(f"| {i} | `{filename}` | {format_file_size(file_info['size_bytes'])} | {file_info['modified_date']} |")
     
-    markdown_content += "\n## File Type Breakdown\n\n"
-    markdown_content += "| Extension | Count | Total Size | Percentage |\n"
-    markdown_content += "|-----------|-------|------------|------------|\n"
+    parts.append("")
+    parts.append("## File Type Breakdown")
+    parts.append("")
+    parts.append("| Extension | Count | Total Size | Percentage |")
+    parts.append("|-----------|-------|------------|------------|")
     
     for type_info in analysis['file_types'][:20]:  # Top 20 file types
         percentage = (type_info['count'] / analysis['total_files']) * 100
         ext_display = type_info['extension'] if type_info['extension'] != '(no extension)' else '*no extension*'
-        markdown_content += f"| `{ext_display}` | {type_info['count']:,} | {type_info['total_size_formatted']} | {percentage:.1f}% |\n"
+        parts.append(f"| `{ext_display}` | {type_info['count']:,} | {type_info['total_size_formatted']} | {percentage:.1f}% |")
     
     if len(analysis['file_types']) > 20:
         remaining = len(analysis['file_types']) - 20
-        markdown_content += f"| *...and {remaining} more* | | | |\n"
+        parts.append(f"| *...and {remaining} more* | | | |")
     
-    markdown_content += "\n## Files by Year\n\n"
-    markdown_content += "| Year | Count | Total Size | Percentage |\n"
-    markdown_content += "|------|-------|------------|------------|\n"
+    parts.append("")
+    parts.append("## Files by Year")
+    parts.append("")
+    parts.append("| Year | Count | Total Size | Percentage |")
+    parts.append("|------|-------|------------|------------|")
     
     for year_info in analysis['files_by_year']:
         percentage = (year_info['count'] / analysis['total_files']) * 100
-        markdown_content += f"| {year_info['year']} | {year_info['count']:,} | {year_info['total_size_formatted']} | {percentage:.1f}% |\n"
+        parts.append(f"| {year_info['year']} | {year_info['count']:,} | {year_info['total_size_formatted']} | {percentage:.1f}% |")
     
     # Add file type summary for Obsidian tags
-    markdown_content += "\n## File Extensions Summary\n\n"
+    tags = []
     for type_info in analysis['file_types'][:10]:
         ext = type_info['extension'].replace('.', '') if type_info['extension'].startswith('.') else type_info['extension']
         if ext != '(no extension)':
-            markdown_content += f"#{ext} "
-    
-    markdown_content += "\n\n---\n\n*Report generated by File Census Tool*\n"
+            tags.append(f"#{ext} ")
+    
+    parts.append("")
+    parts.append("## File Extensions Summary")
+    parts.append("")
+    parts.append("".join(tags))
+    parts.append("")
+    parts.append("---")
+    parts.append("")
+    parts.append("*Report generated by File Census Tool*")
+    parts.append("")
+    
+    markdown_content = "\n".join(parts)
     
     # Write to file
     try: